@@ -0,0 +1,64 @@
+import bisect
+import heapq
+from datetime import timedelta
+
+# --- Ajustes de Carga Horária por Data ---
+
+class HourOverrideIndex:
+    """
+    Índice ordenado de ajustes de horas por intervalo de datas.
+    Cada ajuste é um dicionário {'start': date, 'end': date, 'hours': número, 'description': str};
+    um ajuste de um único dia tem start == end.
+
+    Os ajustes são achatados em intervalos disjuntos e ordenados. Quando dois ajustes se
+    sobrepõem vale o mais curto (ex: um dia de reposição dentro de um período de provas);
+    em caso de empate, vale o cadastrado por último.
+    """
+
+    def __init__(self, overrides=()):
+        self.starts = []
+        self.ends = []
+        self.hours = []
+        self._build(list(overrides))
+
+    def _build(self, overrides):
+        one_day = timedelta(days=1)
+        by_start = sorted(range(len(overrides)), key=lambda i: overrides[i]['start'])
+        points = sorted({o['start'] for o in overrides} | {o['end'] + one_day for o in overrides})
+
+        active = []  # Heap de (duração, -ordem de cadastro, fim, horas)
+        next_override = 0
+        for seg_start, seg_next in zip(points, points[1:]):
+            while next_override < len(by_start) and overrides[by_start[next_override]]['start'] <= seg_start:
+                i = by_start[next_override]
+                o = overrides[i]
+                heapq.heappush(active, ((o['end'] - o['start']).days, -i, o['end'], o['hours']))
+                next_override += 1
+            # Remoção preguiçosa: ajustes encerrados só saem quando chegam ao topo
+            while active and active[0][2] < seg_start:
+                heapq.heappop(active)
+            if not active:
+                continue
+
+            hours = active[0][3]
+            seg_end = seg_next - one_day
+            if self.ends and self.ends[-1] + one_day == seg_start and self.hours[-1] == hours:
+                self.ends[-1] = seg_end  # Une com o intervalo anterior
+            else:
+                self.starts.append(seg_start)
+                self.ends.append(seg_end)
+                self.hours.append(hours)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def position(self, day):
+        """Índice do primeiro intervalo que termina em `day` ou depois (O(log k))."""
+        return bisect.bisect_left(self.ends, day)
+
+    def get(self, day, default=None):
+        """Retorna as horas ajustadas para `day`, ou `default` se não houver ajuste."""
+        i = self.position(day)
+        if i < len(self.starts) and self.starts[i] <= day:
+            return self.hours[i]
+        return default
@@ -4,6 +4,12 @@ from datetime import date, timedelta, datetime
 import calendar
 import os
 
+from cronograma import get_weekday_name, calculate_schedule, summarize_schedule
+from ponto import aggregate_realized_hours, realized_hours_map, project_end_date
+from historico import record_changes, ensure_history, observation_versions
+from ajustes import HourOverrideIndex
+from calendarios import HolidayCalendar, resolve_calendar
+
 # --- Configurações Iniciais ---
 TOTAL_HOURS = 240
 START_DATE = date(2025, 11, 14)
@@ -18,38 +24,46 @@ HOURS_PER_WEEKDAY = {
 }
 HOLIDAYS_CSV = 'feriados.csv'
 OBSERVATIONS_CSV = 'observacoes.csv'
+OVERRIDES_CSV = 'ajustes_horas.csv'
+CLOCK_LOG_FILE = 'ponto.csv'  # Exportação de batidas de ponto (CSV ou JSONL)
+INTERN_ID = None  # Estagiário no arquivo de ponto (None = o único do arquivo, ou escolhido na tela)
+HOLIDAY_LAYERS = ''  # Camadas de calendários em calendarios/ (ex: "nacional + estadual-pb - recesso")
 
 # --- Funções de Lógica de Negócio ---
 
-def get_weekday_name(weekday_index):
-    """Converte o índice do dia da semana (0=Seg, 6=Dom) para o nome em português."""
-    names = ["Segunda-feira", "Terça-feira", "Quarta-feira", "Quinta-feira", "Sexta-feira", "Sábado", "Domingo"]
-    return names[weekday_index]
+def list_schedule_months(start_date, end_date):
+    """Lista os meses do período no formato 'AAAA-MM', sem percorrer o cronograma."""
+    months = []
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
 
-def generate_calendar_view(df_schedule, start_date, end_date):
+def generate_calendar_view(df_schedule, start_date, end_date, months=None):
     """
     Gera uma visualização em formato de calendário mensal.
+    `months` restringe a geração a uma lista de meses 'AAAA-MM' (padrão: todo o período).
     Retorna um dicionário onde a chave é o mês/ano e o valor é HTML do calendário.
     """
     if end_date is None:
         return {}
     
     # Cria um dicionário de dados por data para busca rápida
-    schedule_dict = {}
-    for _, row in df_schedule.iterrows():
-        schedule_dict[row['Data']] = {
-            'hours': row['Horas no dia'],
-            'accumulated': row['Horas acumuladas'],
-            'obs': row['Observação']
-        }
+    schedule_dict = {
+        data: {'hours': hours, 'accumulated': accumulated, 'obs': obs}
+        for data, hours, accumulated, obs in zip(
+            df_schedule['Data'], df_schedule['Horas no dia'],
+            df_schedule['Horas acumuladas'], df_schedule['Observação']
+        )
+    }
     
     calendars_html = {}
-    current = start_date.replace(day=1)
-    end_month = end_date.replace(day=1)
+    if months is None:
+        months = list_schedule_months(start_date, end_date)
     
-    while current <= end_month:
-        year = current.year
-        month = current.month
+    for mes_ano in months:
+        year, month = (int(part) for part in mes_ano.split('-'))
         
         # Nome do mês em português
         month_names = ['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
@@ -127,89 +141,9 @@ def generate_calendar_view(df_schedule, start_date, end_date):
         html += "</table></div>"
         
         calendars_html[f"{month_name} {year}"] = html
-        
-        # Avança para o próximo mês
-        if month == 12:
-            current = date(year + 1, 1, 1)
-        else:
-            current = date(year, month + 1, 1)
     
     return calendars_html
 
-def calculate_schedule(start_date, total_hours, hours_map, holidays, observations):
-    """
-    Calcula o cronograma dia a dia até atingir o total de horas.
-    Retorna um DataFrame com o cronograma e a data de término.
-    """
-    schedule_data = []
-    accumulated_hours = 0
-    current_date = start_date
-    end_date = None
-
-    # Converte a lista de feriados para um set de objetos date para busca rápida
-    holiday_dates = {h['date'] for h in holidays}
-
-    while accumulated_hours < total_hours:
-        weekday = current_date.weekday()
-        
-        # Observação personalizada ou padrão para feriados
-        obs = observations.get(current_date, '')
-        
-        # 1. Verifica se é feriado/dia sem estágio
-        if current_date in holiday_dates:
-            hours_planned = 0
-            # Adiciona a linha, mas sem horas
-            schedule_data.append({
-                'Data': current_date,
-                'Dia da semana': get_weekday_name(weekday),
-                'Horas no dia': hours_planned,
-                'Horas acumuladas': accumulated_hours,
-                'Observação': obs if obs else 'Feriado/Dia sem estágio'
-            })
-            current_date += timedelta(days=1)
-            continue # Pula para o próximo dia
-
-        # 2. Obtém as horas planejadas para o dia da semana
-        hours_planned = hours_map.get(weekday, 0)
-
-        if hours_planned > 0:
-            # 3. Verifica se as horas planejadas excedem o total
-            if accumulated_hours + hours_planned > total_hours:
-                hours_planned = total_hours - accumulated_hours
-            
-            # 4. Atualiza as horas acumuladas
-            accumulated_hours += hours_planned
-            
-            # 5. Registra a linha no cronograma
-            schedule_data.append({
-                'Data': current_date,
-                'Dia da semana': get_weekday_name(weekday),
-                'Horas no dia': hours_planned,
-                'Horas acumuladas': accumulated_hours,
-                'Observação': obs
-            })
-            
-            # 6. Se atingiu o total, esta é a data de término
-            if accumulated_hours == total_hours:
-                end_date = current_date
-                break # Sai do loop principal
-        
-        # 7. Se não houver horas planejadas (Ter/Sáb/Dom), registra com 0 horas
-        else:
-            schedule_data.append({
-                'Data': current_date,
-                'Dia da semana': get_weekday_name(weekday),
-                'Horas no dia': 0,
-                'Horas acumuladas': accumulated_hours,
-                'Observação': obs
-            })
-
-        # Avança para o próximo dia
-        current_date += timedelta(days=1)
-
-    df_schedule = pd.DataFrame(schedule_data)
-    return df_schedule, end_date
-
 # --- Gerenciamento de Estado (Feriados) ---
 
 def load_holidays_from_csv():
@@ -267,12 +201,111 @@ def save_observations_to_csv(observations):
             pd.DataFrame(columns=['date', 'observacao']).to_csv(OBSERVATIONS_CSV, index=False)
     except Exception as e:
         st.error(f"Erro ao salvar observações: {e}")
+        return
+
+    # Registra apenas as datas alteradas no histórico versionado
+    try:
+        record_changes(observations)
+    except Exception as e:
+        st.error(f"Erro ao registrar histórico de observações: {e}")
+
+def load_overrides_from_csv():
+    """Carrega os ajustes de horas por data do arquivo CSV."""
+    if os.path.exists(OVERRIDES_CSV):
+        try:
+            df = pd.read_csv(OVERRIDES_CSV)
+            if not df.empty and 'start' in df.columns:
+                overrides = []
+                for _, row in df.iterrows():
+                    overrides.append({
+                        'start': pd.to_datetime(row['start']).date(),
+                        'end': pd.to_datetime(row['end']).date(),
+                        'hours': row['hours'],
+                        'description': row['description'] if pd.notna(row['description']) else ''
+                    })
+                return overrides
+        except Exception as e:
+            st.error(f"Erro ao carregar ajustes de horas: {e}")
+    return []
+
+def save_overrides_to_csv(overrides):
+    """Salva os ajustes de horas por data no arquivo CSV."""
+    try:
+        df = pd.DataFrame(overrides)
+        if not df.empty:
+            df['start'] = df['start'].apply(lambda x: x.strftime('%Y-%m-%d'))
+            df['end'] = df['end'].apply(lambda x: x.strftime('%Y-%m-%d'))
+            df.to_csv(OVERRIDES_CSV, index=False)
+        else:
+            pd.DataFrame(columns=['start', 'end', 'hours', 'description']).to_csv(OVERRIDES_CSV, index=False)
+    except Exception as e:
+        st.error(f"Erro ao salvar ajustes de horas: {e}")
+
+def effective_holidays():
+    """Calendário efetivo: camadas de HOLIDAY_LAYERS unidas aos feriados cadastrados na barra lateral."""
+    own_holidays = HolidayCalendar.from_dates(h['date'] for h in st.session_state.holidays)
+    try:
+        return resolve_calendar(HOLIDAY_LAYERS) | own_holidays
+    except Exception as e:
+        st.error(f"Erro ao carregar calendários de feriados: {e}")
+        return own_holidays
+
+def schedule_signature():
+    """Resume feriados e ajustes em tuplas imutáveis, usadas como chave dos caches do cronograma."""
+    holiday_dates = effective_holidays().dates
+    override_rows = tuple((o['start'], o['end'], o['hours']) for o in st.session_state.hour_overrides)
+    return holiday_dates, override_rows
+
+def build_override_index(override_rows):
+    """Monta o índice de ajustes a partir das tuplas (início, fim, horas)."""
+    return HourOverrideIndex({'start': start, 'end': end, 'hours': hours} for start, end, hours in override_rows)
+
+@st.cache_data
+def load_schedule_summary(start_date, total_hours, hours_items, holiday_dates, override_rows):
+    """Resumo do cronograma para as métricas do topo e a barra lateral, sem montar o cronograma dia a dia."""
+    return summarize_schedule(
+        start_date,
+        total_hours,
+        dict(hours_items),
+        HolidayCalendar.from_dates(holiday_dates),
+        build_override_index(override_rows)
+    )
+
+@st.cache_data
+def load_schedule(start_date, total_hours, hours_items, holiday_dates, override_rows, observation_items):
+    """Cronograma completo, recalculado apenas quando parâmetros, feriados, ajustes ou observações mudam."""
+    df_schedule, _ = calculate_schedule(
+        start_date,
+        total_hours,
+        dict(hours_items),
+        HolidayCalendar.from_dates(holiday_dates),
+        dict(observation_items),
+        build_override_index(override_rows)
+    )
+    return df_schedule
+
+@st.cache_data
+def format_holidays_table(holiday_rows):
+    """Tabela de feriados formatada para exibição na barra lateral."""
+    df_holidays = pd.DataFrame(holiday_rows, columns=['Data', 'Descrição'])
+    df_holidays['Data'] = df_holidays['Data'].apply(lambda x: x.strftime('%d/%m/%Y')) # Formata para exibição
+    df_holidays.insert(0, 'Remover', False)
+    return df_holidays
+
+@st.cache_data
+def load_realized_hours(path, mtime):
+    """Agrega o arquivo de ponto em horas realizadas por dia. `mtime` invalida o cache quando o arquivo muda."""
+    return aggregate_realized_hours(path, INTERN_ID)
 
 if 'holidays' not in st.session_state:
     st.session_state.holidays = load_holidays_from_csv()
 
 if 'observations' not in st.session_state:
     st.session_state.observations = load_observations_from_csv()
+    ensure_history(st.session_state.observations)
+
+if 'hour_overrides' not in st.session_state:
+    st.session_state.hour_overrides = load_overrides_from_csv()
 
 def add_holiday(holiday_date, description):
     """Adiciona um feriado à lista de feriados na session_state e salva no CSV."""
@@ -294,6 +327,18 @@ def remove_holidays(dates_to_remove):
                 del st.session_state.observations[date_to_remove]
     save_observations_to_csv(st.session_state.observations)
 
+def add_override(start, end, hours, description):
+    """Adiciona um ajuste de horas (um dia ou intervalo) e salva no CSV."""
+    st.session_state.hour_overrides.append({'start': start, 'end': end, 'hours': hours, 'description': description})
+    save_overrides_to_csv(st.session_state.hour_overrides)
+
+def remove_overrides(positions_to_remove):
+    """Remove os ajustes nas posições selecionadas e salva no CSV."""
+    st.session_state.hour_overrides = [
+        o for i, o in enumerate(st.session_state.hour_overrides) if i not in positions_to_remove
+    ]
+    save_overrides_to_csv(st.session_state.hour_overrides)
+
 # --- Interface Streamlit ---
 
 st.set_page_config(
@@ -310,6 +355,12 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# Resumo do cronograma (caminho rápido e cacheado): alimenta a barra lateral e as métricas do topo
+holiday_dates, override_rows = schedule_signature()
+hours_items = tuple(HOURS_PER_WEEKDAY.items())
+summary = load_schedule_summary(START_DATE, TOTAL_HOURS, hours_items, holiday_dates, override_rows)
+end_date = summary['end_date']
+
 # --- Sidebar: Parâmetros e Feriados ---
 with st.sidebar:
     st.markdown("### Parâmetros do Estágio")
@@ -373,14 +424,10 @@ with st.sidebar:
     if st.session_state.holidays:
         st.markdown(f"#### Feriados Cadastrados ({len(st.session_state.holidays)})")
         
-        # Cria um DataFrame para exibição e seleção
-        df_holidays = pd.DataFrame(st.session_state.holidays)
-        df_holidays.columns = ['Data', 'Descrição']
-        df_holidays['Data'] = df_holidays['Data'].apply(lambda x: x.strftime('%d/%m/%Y')) # Formata para exibição
-        
-        # Adiciona uma coluna de seleção
-        df_holidays_with_selection = df_holidays.copy()
-        df_holidays_with_selection.insert(0, 'Remover', False)
+        # Tabela formatada (cacheada) com coluna de seleção
+        df_holidays_with_selection = format_holidays_table(
+            tuple((h['date'], h['description']) for h in st.session_state.holidays)
+        )
         
         # Edita a tabela para permitir seleção
         edited_df = st.data_editor(
@@ -413,25 +460,89 @@ with st.sidebar:
     else:
         st.info("Nenhum feriado cadastrado. Use o botão acima para adicionar.")
 
-# --- Main: Resultados e Cronograma ---
+    if HOLIDAY_LAYERS:
+        st.caption(f"Calendários: `{HOLIDAY_LAYERS}` — {summary['holiday_count']} feriados no total")
 
-# 1. Cálculo do Cronograma
-df_schedule, end_date = calculate_schedule(
-    START_DATE, 
-    TOTAL_HOURS, 
-    HOURS_PER_WEEKDAY, 
-    st.session_state.holidays,
-    st.session_state.observations
-)
+    st.markdown("---")
+
+    # Seção de Ajustes de Carga Horária
+    st.markdown("### Ajustes de Carga Horária")
+
+    with st.expander("Adicionar ajuste", expanded=False):
+        override_range = st.date_input(
+            "Período",
+            value=(date.today(), date.today()),
+            key='new_override_range',
+            help="Selecione um dia (reposição, meio período, sábado) ou um intervalo (ex: período de provas)"
+        )
+        override_hours = st.number_input(
+            "Horas por dia",
+            min_value=0.0,
+            max_value=24.0,
+            value=4.0,
+            step=0.5,
+            key='new_override_hours'
+        )
+        override_description = st.text_input(
+            "Descrição",
+            key='new_override_description',
+            placeholder="Ex: Reposição, Período de provas, etc."
+        )
+
+        if st.button("Adicionar Ajuste", use_container_width=True, type="primary"):
+            # O seletor retorna apenas a data inicial enquanto o intervalo não é concluído
+            if isinstance(override_range, (tuple, list)) and len(override_range) > 0:
+                override_start = override_range[0]
+                override_end = override_range[-1]
+                add_override(override_start, override_end, override_hours, override_description)
+                st.success(f"Ajuste de {override_hours:g}h adicionado com sucesso.")
+                st.rerun()
+            else:
+                st.error("Por favor, selecione um período.")
+
+    # Tabela de Ajustes Cadastrados
+    if st.session_state.hour_overrides:
+        st.markdown(f"#### Ajustes Cadastrados ({len(st.session_state.hour_overrides)})")
+
+        df_overrides = pd.DataFrame(st.session_state.hour_overrides)
+        df_overrides = df_overrides[['start', 'end', 'hours', 'description']]
+        df_overrides.columns = ['Início', 'Fim', 'Horas', 'Descrição']
+        df_overrides['Início'] = df_overrides['Início'].apply(lambda x: x.strftime('%d/%m/%Y'))
+        df_overrides['Fim'] = df_overrides['Fim'].apply(lambda x: x.strftime('%d/%m/%Y'))
+        df_overrides.insert(0, 'Remover', False)
+
+        edited_overrides = st.data_editor(
+            df_overrides,
+            hide_index=True,
+            column_config={
+                "Remover": st.column_config.CheckboxColumn(
+                    "Remover?",
+                    help="Selecione para remover o ajuste",
+                    default=False,
+                ),
+                "Início": st.column_config.Column(disabled=True),
+                "Fim": st.column_config.Column(disabled=True),
+                "Horas": st.column_config.Column(disabled=True),
+                "Descrição": st.column_config.Column(disabled=True),
+            },
+            key="overrides_editor"
+        )
+
+        # Processa a remoção (pela posição, já que pode haver ajustes com o mesmo período)
+        positions_to_remove = set(edited_overrides.index[edited_overrides['Remover'] == True])
+        if positions_to_remove:
+            if st.button("Confirmar Remoção", key="confirm_override_removal_btn", type="primary", use_container_width=True):
+                remove_overrides(positions_to_remove)
+                st.success(f"{len(positions_to_remove)} ajuste(s) removido(s) com sucesso.")
+                st.rerun()
+    else:
+        st.info("Nenhum ajuste cadastrado. Os dias seguem a carga horária semanal.")
+
+# --- Main: Resultados e Cronograma ---
 
-# 2. Resumos no Topo
+# 1. Resumos no Topo (a partir do resumo cacheado, antes de qualquer cálculo pesado)
 if end_date:
-    total_days = (end_date - START_DATE).days + 1
-    # Cálculo simples de semanas úteis (aproximação)
-    # Conta o número de dias de estágio no período
-    working_days = df_schedule[df_schedule['Horas no dia'] > 0].shape[0]
-    # Uma semana "útil" tem 4 dias de estágio (Seg, Qua, Qui, Sex)
-    estimated_weeks = working_days / 4 
+    estimated_weeks = summary['estimated_weeks']
     
     # Cabeçalho da seção
     st.markdown("## Resumo do Cronograma")
@@ -469,24 +580,86 @@ if end_date:
             help="Número estimado de semanas para conclusão"
         )
     
+    # 2. Cronograma completo (cacheado; necessário a partir daqui)
+    df_schedule = load_schedule(
+        START_DATE,
+        TOTAL_HOURS,
+        hours_items,
+        holiday_dates,
+        override_rows,
+        tuple(st.session_state.observations.items())
+    )
+    
+    # Horas realizadas (registros de ponto) x planejadas
+    if os.path.exists(CLOCK_LOG_FILE):
+        try:
+            df_realized = load_realized_hours(CLOCK_LOG_FILE, os.path.getmtime(CLOCK_LOG_FILE))
+        except Exception as e:
+            df_realized = None
+            st.error(f"Erro ao carregar registros de ponto: {e}")
+
+        if df_realized is not None and not df_realized.empty:
+            # As horas de cada estagiário são comparadas só com o próprio planejamento
+            interns = sorted(df_realized['estagiario'].unique())
+            if len(interns) > 1:
+                intern = st.selectbox(
+                    "Estagiário (registros de ponto):",
+                    interns,
+                    key="select_estagiario_ponto",
+                    help="O arquivo de ponto tem batidas de mais de um estagiário; defina INTERN_ID para fixar um deles"
+                )
+            else:
+                intern = interns[0]
+            realized = realized_hours_map(df_realized, intern)
+            as_of = min(max(realized), date.today())
+            realized_total, projected_end = project_end_date(
+                START_DATE,
+                TOTAL_HOURS,
+                HOURS_PER_WEEKDAY,
+                HolidayCalendar.from_dates(holiday_dates),
+                realized,
+                as_of,
+                build_override_index(override_rows)
+            )
+            planned_total = df_schedule[df_schedule['Data'] <= as_of]['Horas no dia'].sum()
+
+            st.markdown("### Horas Realizadas")
+            col_realized, col_planned, col_projected = st.columns(3)
+            with col_realized:
+                st.metric(
+                    "Horas Realizadas",
+                    f"{realized_total:g}h",
+                    delta=f"{realized_total - planned_total:+g}h",
+                    help=f"Horas registradas no ponto até {as_of.strftime('%d/%m/%Y')}, comparadas ao planejado"
+                )
+            with col_planned:
+                st.metric(
+                    "Horas Planejadas",
+                    f"{planned_total:g}h",
+                    help=f"Horas previstas no cronograma até {as_of.strftime('%d/%m/%Y')}"
+                )
+            with col_projected:
+                if projected_end:
+                    st.metric(
+                        "Término Reprojetado",
+                        projected_end.strftime('%d/%m/%Y'),
+                        delta=f"{(projected_end - end_date).days:+d} dias",
+                        delta_color="inverse",
+                        help="Data de término considerando as horas realizadas e o padrão semanal para os dias restantes"
+                    )
+
     st.markdown("---")
 
     # 3. Tabela do Cronograma
     st.markdown("---")
     st.markdown("## Cronograma Detalhado")
         
-    # Formatação para exibição
-    df_display = df_schedule.copy()
-    df_display['Data_Original'] = df_display['Data']  # Mantém a data original para referência
-    df_display['Mes_Ano'] = df_display['Data'].apply(lambda x: x.strftime('%Y-%m'))  # Para agrupar
-    df_display['Data'] = df_display['Data'].apply(lambda x: x.strftime('%d/%m/%Y'))
-    
     # Nomes dos meses em português
     month_names_pt = ['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
                       'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
     
-    # Agrupa por mês/ano
-    meses_unicos = list(df_display['Mes_Ano'].unique())
+    # Meses do período (a partir das datas de início e término)
+    meses_unicos = list_schedule_months(START_DATE, end_date)
     
     # Identifica o mês atual
     hoje = date.today()
@@ -514,9 +687,6 @@ if end_date:
     idx_selecionado = tab_names.index(mes_selecionado)
     mes_ano = meses_unicos[idx_selecionado]
     
-    # Filtra dados do mês selecionado
-    df_mes = df_display[df_display['Mes_Ano'] == mes_ano].copy()
-    
     # Identifica o status do mês (passado, atual ou futuro)
     year_mes, month_mes = mes_ano.split('-')
     primeiro_dia_mes = date(int(year_mes), int(month_mes), 1)
@@ -525,6 +695,12 @@ if end_date:
     else:
         ultimo_dia_mes = date(int(year_mes), int(month_mes) + 1, 1) - timedelta(days=1)
     
+    # Filtra e formata para exibição apenas os dados do mês selecionado
+    df_mes = df_schedule[(df_schedule['Data'] >= primeiro_dia_mes) & (df_schedule['Data'] <= ultimo_dia_mes)].copy()
+    df_mes['Data_Original'] = df_mes['Data']  # Mantém a data original para referência
+    df_mes['Mes_Ano'] = mes_ano
+    df_mes['Data'] = df_mes['Data'].apply(lambda x: x.strftime('%d/%m/%Y'))
+    
     mes_passado = hoje > ultimo_dia_mes
     mes_atual = primeiro_dia_mes <= hoje <= ultimo_dia_mes
     mes_futuro = hoje < primeiro_dia_mes
@@ -593,8 +769,14 @@ if end_date:
     # 4. Visualização em Calendário e Observações
     st.markdown("---")
     
-    # Cria abas principais: Calendário e Observações
-    main_tab_calendario, main_tab_observacoes = st.tabs(["📅 Calendário", "📝 Observações"])
+    # Seletor das seções principais: apenas a seção escolhida é montada
+    secao_selecionada = st.radio(
+        "Seção:",
+        ["📅 Calendário", "📝 Observações"],
+        horizontal=True,
+        key="select_secao",
+        label_visibility="collapsed"
+    )
     
     # Filtra observações válidas (para uso em ambas as abas)
     observacoes_validas = {
@@ -602,37 +784,24 @@ if end_date:
         if v and v.strip() and v.strip() != 'Feriado/Dia sem estágio' and v.strip() != 'Sobreaviso'
     }
     
-    # Nomes dos meses em português (para uso no calendário)
-    month_names_pt = ['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
-                      'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
+    # Horas por data, para consulta direta nas observações
+    horas_por_data = dict(zip(df_schedule['Data'], df_schedule['Horas no dia']))
     
-    with main_tab_calendario:
+    if secao_selecionada == "📅 Calendário":
         st.markdown("## Visualização em Calendário")
         
-        calendars = generate_calendar_view(df_schedule, START_DATE, end_date)
-        
-        if calendars:
-            # Identifica o mês atual
-            hoje_cal = date.today()
-            mes_atual_nome = month_names_pt[hoje_cal.month - 1] + " " + str(hoje_cal.year)
-            
-            # Cria lista de meses e encontra índice do mês atual
-            calendar_keys = list(calendars.keys())
-            indice_mes_atual_cal = 0
-            for idx, key in enumerate(calendar_keys):
-                if key == mes_atual_nome:
-                    indice_mes_atual_cal = idx
-                    break
-            
-            # Seletor de mês (com mês atual como padrão)
+        if tab_names:
+            # Seletor de mês (com mês atual como padrão); os nomes seguem o formato do calendário
             mes_calendario_selecionado = st.selectbox(
                 "Selecione o mês:",
-                calendar_keys,
-                index=indice_mes_atual_cal,
+                tab_names,
+                index=indice_mes_atual,
                 key="select_mes_calendario"
             )
             
-            # Exibe o calendário do mês selecionado
+            # Gera e exibe apenas o calendário do mês selecionado
+            mes_ano_calendario = meses_unicos[tab_names.index(mes_calendario_selecionado)]
+            calendars = generate_calendar_view(df_schedule, START_DATE, end_date, months=[mes_ano_calendario])
             cal_html = calendars[mes_calendario_selecionado]
             st.markdown(cal_html, unsafe_allow_html=True)
             
@@ -682,11 +851,7 @@ if end_date:
                     data_obj = datetime.strptime(data_str, '%d/%m/%Y').date()
                     
                     # Busca as horas trabalhadas nesse dia
-                    horas_dia = 0
-                    for _, row in df_schedule.iterrows():
-                        if row['Data'] == data_obj:
-                            horas_dia = row['Horas no dia']
-                            break
+                    horas_dia = horas_por_data.get(data_obj, 0)
                     
                     dia_semana = get_weekday_name(data_obj.weekday())
                     texto_obs = obs_do_mes[data_obj]
@@ -706,7 +871,7 @@ if end_date:
                     </div>
                     """, unsafe_allow_html=True)
     
-    with main_tab_observacoes:
+    else:
         st.markdown("## Observações do Estágio")
         st.markdown("*Registro detalhado das atividades realizadas em cada dia*")
         
@@ -723,11 +888,7 @@ if end_date:
                 data_formatada = data_obs.strftime('%d/%m/%Y')
                 
                 # Busca as horas trabalhadas nesse dia
-                horas_dia = 0
-                for _, row in df_schedule.iterrows():
-                    if row['Data'] == data_obs:
-                        horas_dia = row['Horas no dia']
-                        break
+                horas_dia = horas_por_data.get(data_obs, 0)
                 
                 # Cria um card para cada observação
                 with st.expander(f"📌 {data_formatada} ({dia_semana}) - {horas_dia}h trabalhadas", expanded=False):
@@ -746,6 +907,32 @@ if end_date:
 {texto_obs}
                     </div>
                     """, unsafe_allow_html=True)
+
+            # Histórico de versões de uma data
+            st.markdown("---")
+            st.markdown("##### 🕘 Histórico de versões")
+            opcoes_historico = ["Selecione uma data..."] + [
+                data_obs.strftime('%d/%m/%Y') for data_obs, _ in observacoes_ordenadas
+            ]
+            data_historico = st.selectbox(
+                "Data para consultar o histórico:",
+                opcoes_historico,
+                key="select_historico_obs",
+                label_visibility="collapsed"
+            )
+            if data_historico != "Selecione uma data...":
+                data_obj = datetime.strptime(data_historico, '%d/%m/%Y').date()
+                versoes = observation_versions(data_obj)
+                if versoes:
+                    for ts, texto in reversed(versoes):
+                        ts_formatado = datetime.fromisoformat(ts).strftime('%d/%m/%Y %H:%M')
+                        with st.expander(f"Versão de {ts_formatado}", expanded=False):
+                            if texto is None:
+                                st.markdown("*Observação removida*")
+                            else:
+                                st.text(texto)
+                else:
+                    st.info("Nenhuma versão registrada para esta data.")
         else:
             st.info("📭 Nenhuma observação detalhada cadastrada ainda.")
             st.markdown("""
@@ -0,0 +1,120 @@
+import os
+import re
+from datetime import date
+from functools import cached_property, lru_cache
+
+import numpy as np
+import pandas as pd
+
+# --- Calendários de Feriados em Camadas ---
+#
+# Cada calendário nomeado é um CSV em CALENDARS_DIR com o mesmo formato de
+# feriados.csv (date,description), ex: calendarios/nacional.csv.
+# O calendário efetivo de um estagiário é descrito por uma expressão de camadas,
+# aplicadas da esquerda para a direita:
+#   "nacional + estadual-pb + municipal-jp - recesso-revogado"
+# '+' une as datas do calendário e '-' remove as datas do calendário do resultado.
+# Como nomes podem conter hífen, separe os operadores com espaços. Qualquer outro
+# caractere (vírgula, travessão "–", "*", ...) ou dois nomes sem operador entre eles
+# tornam a expressão inválida.
+
+CALENDARS_DIR = 'calendarios'
+
+_LAYER_PATTERN = re.compile(r'\s*([+-]?)\s*(\w[\w-]*)\s*')
+
+class HolidayCalendar:
+    """
+    Conjunto imutável de feriados, armazenado como array ordenado de ordinais de data (int32).
+    União (`|`) e exclusão (`-`) são feitas sobre os arrays, sem montar sets de dicionários.
+    """
+
+    def __init__(self, ordinals=()):
+        self.ordinals = np.unique(np.asarray(ordinals, dtype=np.int32))
+
+    @classmethod
+    def from_dates(cls, dates):
+        return cls([d.toordinal() for d in dates])
+
+    def __or__(self, other):
+        return HolidayCalendar(np.union1d(self.ordinals, other.ordinals))
+
+    def __sub__(self, other):
+        return HolidayCalendar(np.setdiff1d(self.ordinals, other.ordinals, assume_unique=True))
+
+    def __len__(self):
+        return len(self.ordinals)
+
+    def __contains__(self, day):
+        ordinal = day.toordinal()
+        i = np.searchsorted(self.ordinals, ordinal)
+        return i < len(self.ordinals) and self.ordinals[i] == ordinal
+
+    @cached_property
+    def dates(self):
+        """Datas em ordem crescente (convertidas uma única vez por calendário)."""
+        return tuple(date.fromordinal(int(o)) for o in self.ordinals)
+
+def calendar_path(name):
+    """Caminho do CSV de um calendário nomeado."""
+    return os.path.join(CALENDARS_DIR, f"{name}.csv")
+
+def list_calendars():
+    """Nomes dos calendários disponíveis em CALENDARS_DIR."""
+    if not os.path.isdir(CALENDARS_DIR):
+        return []
+    return sorted(f[:-len('.csv')] for f in os.listdir(CALENDARS_DIR) if f.endswith('.csv'))
+
+def parse_layers(spec):
+    """
+    Converte uma expressão de camadas em uma tupla de (operação, nome do calendário).
+    Levanta ValueError se algum trecho da expressão não for reconhecido.
+    """
+    spec = spec or ''
+    layers = []
+    position = 0
+    while spec[position:].strip():
+        match = _LAYER_PATTERN.match(spec, position)
+        # Só a primeira camada pode omitir o operador
+        if match is None or (layers and not match.group(1)):
+            raise ValueError(
+                f"Expressão de camadas inválida: '{spec}' (trecho não reconhecido: '{spec[position:].strip()}')"
+            )
+        layers.append((match.group(1) or '+', match.group(2)))
+        position = match.end()
+    return tuple(layers)
+
+@lru_cache(maxsize=128)
+def _load_calendar(path, mtime):
+    df = pd.read_csv(path, usecols=['date'])
+    dates = pd.to_datetime(df['date'], format='%Y-%m-%d').dt.date
+    return HolidayCalendar.from_dates(dates)
+
+def load_calendar(name):
+    """Carrega um calendário nomeado; o resultado é reaproveitado enquanto o arquivo não mudar."""
+    path = calendar_path(name)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Calendário '{name}' não encontrado em {CALENDARS_DIR}/")
+    return _load_calendar(path, os.path.getmtime(path))
+
+@lru_cache(maxsize=256)
+def _resolve_layers(layers, mtimes):
+    calendar = HolidayCalendar()
+    for op, name in layers:
+        if op == '+':
+            calendar = calendar | load_calendar(name)
+        else:
+            calendar = calendar - load_calendar(name)
+    return calendar
+
+def resolve_calendar(spec):
+    """
+    Resolve uma expressão de camadas no calendário efetivo.
+    O resultado é cacheado pela expressão e pela data de modificação dos arquivos envolvidos,
+    então estagiários com as mesmas camadas compartilham o mesmo calendário.
+    """
+    layers = parse_layers(spec)
+    mtimes = tuple(
+        os.path.getmtime(calendar_path(name)) if os.path.exists(calendar_path(name)) else None
+        for _, name in layers
+    )
+    return _resolve_layers(layers, mtimes)
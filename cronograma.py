@@ -0,0 +1,192 @@
+import bisect
+import pandas as pd
+from datetime import timedelta
+
+from ajustes import HourOverrideIndex
+from calendarios import HolidayCalendar
+
+# --- Funções de Lógica de Negócio (sem dependência do Streamlit) ---
+
+def get_weekday_name(weekday_index):
+    """Converte o índice do dia da semana (0=Seg, 6=Dom) para o nome em português."""
+    names = ["Segunda-feira", "Terça-feira", "Quarta-feira", "Quinta-feira", "Sexta-feira", "Sábado", "Domingo"]
+    return names[weekday_index]
+
+def _sorted_holiday_dates(holidays):
+    """Datas de feriado em ordem crescente, a partir de um HolidayCalendar ou de uma lista de {'date': ...}."""
+    if isinstance(holidays, HolidayCalendar):
+        return holidays.dates
+    return sorted({h['date'] for h in holidays})
+
+def calculate_schedule(start_date, total_hours, hours_map, holidays, observations, overrides=None):
+    """
+    Calcula o cronograma dia a dia até atingir o total de horas.
+    `holidays` pode ser uma lista de {'date': ...} ou um HolidayCalendar.
+    `overrides` é um HourOverrideIndex opcional com ajustes de horas por data,
+    que substituem o padrão semanal (feriados continuam com 0 horas).
+    Retorna um DataFrame com o cronograma e a data de término.
+    """
+    schedule_data = []
+    accumulated_hours = 0
+    current_date = start_date
+    end_date = None
+
+    # Cursor sobre os feriados ordenados, posicionado por busca binária na data inicial
+    holiday_dates = _sorted_holiday_dates(holidays)
+    holiday_pos = bisect.bisect_left(holiday_dates, start_date)
+
+    # Cursor sobre os ajustes: uma busca binária no início e avanço a cada fim de intervalo
+    overrides = overrides if overrides is not None else HourOverrideIndex()
+    override_pos = overrides.position(start_date)
+
+    while accumulated_hours < total_hours:
+        weekday = current_date.weekday()
+        
+        # Observação personalizada ou padrão para feriados
+        obs = observations.get(current_date, '')
+        
+        # 1. Verifica se é feriado/dia sem estágio
+        while holiday_pos < len(holiday_dates) and holiday_dates[holiday_pos] < current_date:
+            holiday_pos += 1
+        if holiday_pos < len(holiday_dates) and holiday_dates[holiday_pos] == current_date:
+            hours_planned = 0
+            # Adiciona a linha, mas sem horas
+            schedule_data.append({
+                'Data': current_date,
+                'Dia da semana': get_weekday_name(weekday),
+                'Horas no dia': hours_planned,
+                'Horas acumuladas': accumulated_hours,
+                'Observação': obs if obs else 'Feriado/Dia sem estágio'
+            })
+            current_date += timedelta(days=1)
+            continue # Pula para o próximo dia
+
+        # 2. Obtém as horas planejadas: ajuste da data, se houver, ou padrão do dia da semana
+        while override_pos < len(overrides) and overrides.ends[override_pos] < current_date:
+            override_pos += 1
+        if override_pos < len(overrides) and overrides.starts[override_pos] <= current_date:
+            hours_planned = overrides.hours[override_pos]
+        else:
+            hours_planned = hours_map.get(weekday, 0)
+
+        if hours_planned > 0:
+            # 3. Verifica se as horas planejadas excedem o total
+            if accumulated_hours + hours_planned > total_hours:
+                hours_planned = total_hours - accumulated_hours
+            
+            # 4. Atualiza as horas acumuladas
+            accumulated_hours += hours_planned
+            
+            # 5. Registra a linha no cronograma
+            schedule_data.append({
+                'Data': current_date,
+                'Dia da semana': get_weekday_name(weekday),
+                'Horas no dia': hours_planned,
+                'Horas acumuladas': accumulated_hours,
+                'Observação': obs
+            })
+            
+            # 6. Se atingiu o total, esta é a data de término
+            if accumulated_hours >= total_hours:
+                end_date = current_date
+                break # Sai do loop principal
+        
+        # 7. Se não houver horas planejadas (Ter/Sáb/Dom), registra com 0 horas
+        else:
+            schedule_data.append({
+                'Data': current_date,
+                'Dia da semana': get_weekday_name(weekday),
+                'Horas no dia': 0,
+                'Horas acumuladas': accumulated_hours,
+                'Observação': obs
+            })
+
+        # Avança para o próximo dia
+        current_date += timedelta(days=1)
+
+    df_schedule = pd.DataFrame(schedule_data)
+    return df_schedule, end_date
+
+def _walk_to_total(start_date, total_hours, hours_map, holidays, overrides=None):
+    """
+    Percorre o calendário com as mesmas regras de `calculate_schedule`, sem montar o cronograma.
+    Entre feriados e ajustes, avança semanas inteiras de uma vez.
+    Retorna (data de término, dias com horas); a data é None se o total não puder ser atingido.
+    """
+    if total_hours <= 0:
+        return None, 0
+
+    one_day = timedelta(days=1)
+    weekly_hours = sum(hours_map.get(weekday, 0) for weekday in range(7))
+    weekly_working_days = sum(1 for weekday in range(7) if hours_map.get(weekday, 0) > 0)
+    overrides = overrides if overrides is not None else HourOverrideIndex()
+    holiday_dates = _sorted_holiday_dates(holidays)
+
+    accumulated_hours = 0
+    working_days = 0
+    current_date = start_date
+    holiday_pos = bisect.bisect_left(holiday_dates, start_date)
+    override_pos = overrides.position(start_date)
+
+    while True:
+        # Avança os cursores de feriados e ajustes até a data atual
+        while holiday_pos < len(holiday_dates) and holiday_dates[holiday_pos] < current_date:
+            holiday_pos += 1
+        while override_pos < len(overrides) and overrides.ends[override_pos] < current_date:
+            override_pos += 1
+
+        next_holiday = holiday_dates[holiday_pos] if holiday_pos < len(holiday_dates) else None
+        next_override = overrides.starts[override_pos] if override_pos < len(overrides) else None
+
+        if current_date == next_holiday:
+            hours_planned = 0
+        elif next_override is not None and next_override <= current_date:
+            hours_planned = overrides.hours[override_pos]
+        else:
+            if weekly_hours <= 0 and next_override is None:
+                return None, working_days  # Nenhuma hora prevista daqui em diante
+
+            # Salta semanas completas que terminam antes do próximo feriado/ajuste e do total
+            limits = [d for d in (next_holiday, next_override) if d is not None]
+            if weekly_hours > 0:
+                weeks = -(-(total_hours - accumulated_hours) // weekly_hours) - 1
+                if limits:
+                    weeks = min(weeks, (min(limits) - current_date).days // 7)
+                if weeks > 0:
+                    accumulated_hours += weeks * weekly_hours
+                    working_days += int(weeks) * weekly_working_days
+                    current_date += timedelta(weeks=weeks)
+                    continue
+            hours_planned = hours_map.get(current_date.weekday(), 0)
+
+        if hours_planned > 0:
+            accumulated_hours += hours_planned
+            working_days += 1
+            if accumulated_hours >= total_hours:
+                return current_date, working_days
+        current_date += one_day
+
+def calculate_end_date(start_date, total_hours, hours_map, holidays, overrides=None):
+    """
+    Calcula apenas a data de término, com as mesmas regras de `calculate_schedule`.
+    Retorna None se o total não puder ser atingido.
+    """
+    end_date, _ = _walk_to_total(start_date, total_hours, hours_map, holidays, overrides)
+    return end_date
+
+def summarize_schedule(start_date, total_hours, hours_map, holidays, overrides=None):
+    """
+    Calcula o resumo do cronograma (usado nas métricas do topo) sem montar o cronograma dia a dia.
+    Retorna um dicionário com 'end_date', 'total_days', 'working_days', 'estimated_weeks'
+    e 'holiday_count'.
+    """
+    end_date, working_days = _walk_to_total(start_date, total_hours, hours_map, holidays, overrides)
+    # Uma semana "útil" tem tantos dias de estágio quanto os dias com horas no padrão semanal
+    weekly_working_days = sum(1 for weekday in range(7) if hours_map.get(weekday, 0) > 0)
+    return {
+        'end_date': end_date,
+        'total_days': (end_date - start_date).days + 1 if end_date else 0,
+        'working_days': working_days,
+        'estimated_weeks': working_days / weekly_working_days if weekly_working_days else 0,
+        'holiday_count': len(_sorted_holiday_dates(holidays)),
+    }
@@ -0,0 +1,293 @@
+import bisect
+import json
+import os
+import shutil
+from datetime import date, datetime, timedelta
+
+# --- Histórico Versionado de Observações ---
+#
+# O histórico é um log append-only (JSONL) com uma linha por data alterada:
+#   {"ts": "2025-12-01T17:05:00.000000", "date": "2025-12-01", "obs": "texto"}
+# onde "obs" é null quando a observação foi apagada. Entradas que passaram por uma
+# compactação levam também "w", o início da janela de agrupamento a que pertencem.
+# A cada CHECKPOINT_INTERVAL entradas é gravado um checkpoint com o estado completo;
+# o índice de checkpoints (CSV pequeno) guarda o timestamp e as posições em bytes no
+# log e no arquivo de checkpoints, permitindo reconstruir o estado em qualquer instante
+# lendo apenas um checkpoint e as entradas seguintes. A compactação mantém cerca de
+# log2(N / CHECKPOINT_INTERVAL) checkpoints, espaçados em distâncias 1, 2, 4, 8, ... a
+# partir do fim e cobrindo o log inteiro: o espaço ocupado cresce só logaritmicamente
+# com o número de edições e reconstruir um instante que está d entradas antes do fim
+# reaplica no máximo cerca de max(d, CHECKPOINT_INTERVAL) entradas (consultas antigas
+# custam mais, nunca o log todo).
+#
+# Os três arquivos de uma versão do histórico ficam juntos em um diretório de geração
+# (historico/g1/, historico/g2/, ...) e GENERATION_FILE aponta para a geração atual;
+# sem ele, os arquivos ficam direto em HISTORY_DIR. A compactação grava uma nova geração
+# e troca o ponteiro com um único os.replace, então uma interrupção no meio dela deixa a
+# geração anterior intacta. Checkpoints cujos offsets não caem em início de linha são
+# ignorados e o estado é reconstruído do começo do log.
+
+HISTORY_DIR = 'historico'
+GENERATION_FILE = os.path.join(HISTORY_DIR, 'geracao.txt')
+LOG_NAME = 'observacoes.jsonl'
+CHECKPOINTS_NAME = 'checkpoints.jsonl'
+INDEX_NAME = 'checkpoints.csv'
+
+CHECKPOINT_INTERVAL = 50  # Entradas no log entre dois checkpoints
+COMPACTION_INTERVAL = 10  # Checkpoints além dos mantidos pela compactação que disparam uma nova
+MERGE_WINDOW = timedelta(minutes=10)  # Edições da mesma data dentro da janela viram uma só
+
+def _now():
+    return datetime.now().isoformat(timespec='microseconds')
+
+def _diff_observations(old, new):
+    """Retorna as alterações entre dois estados como lista de (data, texto ou None)."""
+    changes = []
+    for obs_date in sorted(set(old) | set(new)):
+        new_obs = new.get(obs_date) or None
+        if (old.get(obs_date) or None) != new_obs:
+            changes.append((obs_date, new_obs))
+    return changes
+
+def _checkpoint_positions(candidates):
+    """
+    Escolhe, entre `candidates` posições de checkpoint (numeradas de 1 a `candidates`), a mais
+    recente, as que estão 1, 3, 7, 15, ... posições antes dela e a mais antiga.
+    """
+    positions = {1} if candidates else set()
+    step = 1
+    while step <= candidates:
+        positions.add(candidates - step + 1)
+        step *= 2
+    return positions
+
+def _generation():
+    """Nome do diretório da geração atual (vazio quando os arquivos ficam direto em HISTORY_DIR)."""
+    if not os.path.exists(GENERATION_FILE):
+        return ''
+    with open(GENERATION_FILE, encoding='utf-8') as f:
+        return f.read().strip()
+
+def _history_paths(generation=None):
+    """Caminhos (log, checkpoints, índice) de uma geração; por padrão, da atual."""
+    base = os.path.join(HISTORY_DIR, _generation() if generation is None else generation)
+    return (os.path.join(base, LOG_NAME), os.path.join(base, CHECKPOINTS_NAME), os.path.join(base, INDEX_NAME))
+
+def _at_line_start(f, offset):
+    """Indica se `offset` é o início de uma linha do arquivo binário `f` (ou o seu fim)."""
+    if offset == 0:
+        return True
+    f.seek(offset - 1)
+    return f.read(1) == b'\n'
+
+def _read_index(index_path):
+    """Lê o índice de checkpoints como lista de (ts, offset no log, offset no arquivo de checkpoints)."""
+    index = []
+    if os.path.exists(index_path):
+        with open(index_path, encoding='utf-8') as f:
+            next(f, None)  # Cabeçalho
+            for line in f:
+                ts, log_offset, checkpoint_offset = line.rstrip('\n').split(',')
+                index.append((ts, int(log_offset), int(checkpoint_offset)))
+    return index
+
+def _read_checkpoint(checkpoints_path, checkpoint_offset):
+    """Lê o checkpoint na posição indicada; retorna None se a posição não for válida."""
+    with open(checkpoints_path, 'rb') as f:
+        if not _at_line_start(f, checkpoint_offset):
+            return None
+        try:
+            snapshot = json.loads(f.readline())
+        except ValueError:
+            return None
+    return {date.fromisoformat(d): v for d, v in snapshot.items()}
+
+def _append_checkpoint(paths, ts, log_offset, observations):
+    """Grava o estado completo como checkpoint e registra sua posição no índice."""
+    _, checkpoints_path, index_path = paths
+    snapshot = {d.strftime('%Y-%m-%d'): v for d, v in observations.items() if v}
+    with open(checkpoints_path, 'ab') as f:
+        checkpoint_offset = f.tell()
+        f.write((json.dumps(snapshot, ensure_ascii=False) + '\n').encode('utf-8'))
+
+    write_header = not os.path.exists(index_path)
+    with open(index_path, 'a', encoding='utf-8') as f:
+        if write_header:
+            f.write('ts,log_offset,checkpoint_offset\n')
+        f.write(f"{ts},{log_offset},{checkpoint_offset}\n")
+
+def _replay(observations, log_file, until=None):
+    """Aplica as entradas do log (a partir da posição atual) ao estado, até o timestamp `until` (inclusive)."""
+    for line in log_file:
+        entry = json.loads(line)
+        if until is not None and entry['ts'] > until:
+            break
+        obs_date = date.fromisoformat(entry['date'])
+        if entry['obs'] is None:
+            observations.pop(obs_date, None)
+        else:
+            observations[obs_date] = entry['obs']
+    return observations
+
+def record_changes(observations, timestamp=None):
+    """
+    Registra no histórico as datas cuja observação mudou em relação à última versão registrada.
+    Retorna o número de entradas gravadas.
+    """
+    changes = _diff_observations(observations_as_of(None), observations)
+    if not changes:
+        return 0
+
+    paths = _history_paths()
+    log_path, _, index_path = paths
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    ts = timestamp or _now()
+    with open(log_path, 'ab') as f:
+        for obs_date, obs in changes:
+            entry = {'ts': ts, 'date': obs_date.strftime('%Y-%m-%d'), 'obs': obs}
+            f.write((json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8'))
+        log_offset = f.tell()
+
+    # Conta as entradas desde o último checkpoint (no máximo CHECKPOINT_INTERVAL linhas)
+    index = _read_index(index_path)
+    last_offset = index[-1][1] if index else 0
+    with open(log_path, 'rb') as f:
+        if not _at_line_start(f, last_offset):
+            last_offset = 0
+        f.seek(last_offset)
+        pending = sum(1 for _ in f)
+
+    if pending >= CHECKPOINT_INTERVAL:
+        _append_checkpoint(paths, ts, log_offset, observations)
+        # Compacta quando há COMPACTION_INTERVAL checkpoints além dos que a compactação manteria
+        if len(index) + 1 >= len(_checkpoint_positions(len(index) + 1)) + COMPACTION_INTERVAL:
+            compact_history()
+
+    return len(changes)
+
+def ensure_history(observations):
+    """Inicializa o histórico com o estado atual caso ele ainda não exista."""
+    if not os.path.exists(_history_paths()[0]):
+        record_changes(observations)
+
+def observations_as_of(timestamp):
+    """
+    Reconstrói as observações como estavam no instante `timestamp` (datetime ou string ISO;
+    None retorna a versão mais recente). Parte do último checkpoint anterior ao instante
+    e reaplica apenas as entradas seguintes; se o checkpoint não for válido, reaplica o
+    log inteiro.
+    """
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.isoformat(timespec='microseconds')
+    log_path, checkpoints_path, index_path = _history_paths()
+    if not os.path.exists(log_path):
+        return {}
+
+    index = _read_index(index_path)
+    if timestamp is None:
+        position = len(index)
+    else:
+        position = bisect.bisect_right([ts for ts, _, _ in index], timestamp)
+
+    with open(log_path, 'rb') as f:
+        observations = None
+        if position > 0:
+            _, log_offset, checkpoint_offset = index[position - 1]
+            if _at_line_start(f, log_offset):
+                observations = _read_checkpoint(checkpoints_path, checkpoint_offset)
+        if observations is None:
+            observations, log_offset = {}, 0
+        f.seek(log_offset)
+        return _replay(observations, f, until=timestamp)
+
+def observation_versions(obs_date):
+    """Lista as versões de uma data como (timestamp, texto ou None), da mais antiga para a mais recente."""
+    versions = []
+    log_path = _history_paths()[0]
+    if os.path.exists(log_path):
+        key = f'"date": "{obs_date.strftime("%Y-%m-%d")}"'
+        with open(log_path, encoding='utf-8') as f:
+            for line in f:
+                # Filtro textual barato antes de decodificar o JSON
+                if key in line:
+                    entry = json.loads(line)
+                    versions.append((entry['ts'], entry['obs']))
+    return versions
+
+def compact_history(merge_window=MERGE_WINDOW):
+    """
+    Compacta o histórico: as edições de uma mesma data são agrupadas em janelas de
+    `merge_window` contadas a partir da primeira edição de cada janela, e apenas a última
+    versão de cada janela é mantida (toda versão mantida existiu de fato). O início da
+    janela fica gravado na entrada mantida ("w"), então uma nova compactação só agrupa
+    edições posteriores na mesma janela e nunca junta janelas já fechadas. Os checkpoints
+    são regravados com espaçamento logarítmico (ver `_checkpoint_positions`).
+    Os arquivos são gravados em uma nova geração, que passa a ser a atual ao final.
+    """
+    current = _generation()
+    log_path = _history_paths(current)[0]
+    if not os.path.exists(log_path):
+        return
+
+    with open(log_path, encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f]
+
+    # Por data: (início da janela atual, posição da última edição na janela). Uma edição
+    # dentro da janela substitui a anterior; fora dela, abre uma nova janela. Uma entrada
+    # já compactada é comparada pelo início da sua janela, e não pelo seu timestamp.
+    keep = [True] * len(entries)
+    windows = {}
+    for position, entry in enumerate(entries):
+        start = entry.get('w', entry['ts'])
+        window = windows.get(entry['date'])
+        if window is not None and (
+                datetime.fromisoformat(start) - datetime.fromisoformat(window[0]) <= merge_window):
+            keep[window[1]] = False
+            start = window[0]
+        windows[entry['date']] = (start, position)
+        entry['w'] = start
+
+    # Posições candidatas a checkpoint: a cada CHECKPOINT_INTERVAL entradas mantidas
+    candidates = sum(keep) // CHECKPOINT_INTERVAL
+    checkpoint_at = {p * CHECKPOINT_INTERVAL for p in _checkpoint_positions(candidates)}
+
+    # Uma sobra de compactação interrompida com o mesmo nome é descartada
+    generation = f"g{int(current[1:]) + 1 if current else 1}"
+    new_log, new_checkpoints, new_index = _history_paths(generation)
+    shutil.rmtree(os.path.dirname(new_log), ignore_errors=True)
+    os.makedirs(os.path.dirname(new_log))
+
+    observations = {}
+    written = 0
+    with open(new_log, 'wb') as log, open(new_checkpoints, 'wb') as checkpoints, \
+            open(new_index, 'w', encoding='utf-8') as index:
+        index.write('ts,log_offset,checkpoint_offset\n')
+        for entry, kept in zip(entries, keep):
+            if not kept:
+                continue
+            log.write((json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8'))
+            obs_date = date.fromisoformat(entry['date'])
+            if entry['obs'] is None:
+                observations.pop(obs_date, None)
+            else:
+                observations[obs_date] = entry['obs']
+
+            written += 1
+            if written in checkpoint_at:
+                snapshot = {d.strftime('%Y-%m-%d'): v for d, v in observations.items()}
+                index.write(f"{entry['ts']},{log.tell()},{checkpoints.tell()}\n")
+                checkpoints.write((json.dumps(snapshot, ensure_ascii=False) + '\n').encode('utf-8'))
+
+    # Troca de geração em uma única operação atômica
+    tmp_generation = GENERATION_FILE + '.tmp'
+    with open(tmp_generation, 'w', encoding='utf-8') as f:
+        f.write(generation)
+    os.replace(tmp_generation, GENERATION_FILE)
+
+    # Remove a geração anterior (os arquivos direto em HISTORY_DIR, se era a primeira)
+    if current:
+        shutil.rmtree(os.path.join(HISTORY_DIR, current), ignore_errors=True)
+    else:
+        for path in _history_paths(''):
+            if os.path.exists(path):
+                os.remove(path)
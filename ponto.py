@@ -0,0 +1,101 @@
+import pandas as pd
+from datetime import timedelta
+
+from cronograma import calculate_end_date
+
+# --- Ingestão de Registros de Ponto ---
+
+# Colunas esperadas na exportação de ponto (CSV ou JSONL), uma linha por batida
+# entrada/saída. Os horários devem estar em formato ISO (ex: 2025-11-14 08:00).
+PUNCH_COLUMNS = ['estagiario', 'entrada', 'saida']
+# Quantidade de linhas lidas por bloco; limita o uso de memória em arquivos grandes
+CHUNK_SIZE = 200_000
+
+def iter_punch_chunks(path, chunksize=CHUNK_SIZE):
+    """
+    Lê o arquivo de ponto em blocos de `chunksize` linhas.
+    Arquivos .jsonl/.json são lidos como JSON por linha; os demais como CSV.
+    """
+    if path.endswith(('.jsonl', '.json')):
+        reader = pd.read_json(path, lines=True, chunksize=chunksize, dtype=False, convert_dates=False)
+    else:
+        reader = pd.read_csv(path, usecols=PUNCH_COLUMNS, chunksize=chunksize, dtype=str)
+
+    with reader:
+        for chunk in reader:
+            yield chunk[PUNCH_COLUMNS]
+
+def _daily_hours_from_chunk(chunk, intern=None):
+    """
+    Converte um bloco de batidas em horas realizadas por (estagiário, dia).
+    Batidas sem saída, com horário inválido ou com duração negativa são descartadas.
+    As horas são atribuídas ao dia da entrada.
+    """
+    if intern is not None:
+        chunk = chunk[chunk['estagiario'].astype(str) == str(intern)]
+
+    entrada = pd.to_datetime(chunk['entrada'], errors='coerce', format='ISO8601')
+    saida = pd.to_datetime(chunk['saida'], errors='coerce', format='ISO8601')
+    hours = (saida - entrada).dt.total_seconds() / 3600
+
+    valid = hours > 0  # NaN (batida incompleta) também é descartado
+    daily = pd.DataFrame({
+        'estagiario': chunk['estagiario'][valid].astype(str),
+        'Data': entrada[valid].dt.normalize(),
+        'Horas realizadas': hours[valid],
+    })
+    return daily.groupby(['estagiario', 'Data'], sort=False)['Horas realizadas'].sum()
+
+def aggregate_realized_hours(path, intern=None, chunksize=CHUNK_SIZE):
+    """
+    Agrega o arquivo de ponto em horas realizadas por estagiário e por dia.
+    O arquivo é processado em blocos; só o agregado (estagiário x dia) fica em memória.
+    Retorna um DataFrame com as colunas 'estagiario', 'Data' (date) e 'Horas realizadas'.
+    """
+    total = None
+    for chunk in iter_punch_chunks(path, chunksize):
+        partial = _daily_hours_from_chunk(chunk, intern)
+        if total is None:
+            total = partial
+        else:
+            total = pd.concat([total, partial]).groupby(level=[0, 1], sort=False).sum()
+
+    if total is None or total.empty:
+        return pd.DataFrame(columns=['estagiario', 'Data', 'Horas realizadas'])
+
+    df = total.sort_index().reset_index()
+    df['Data'] = df['Data'].dt.date
+    df['Horas realizadas'] = df['Horas realizadas'].round(2)
+    return df
+
+def realized_hours_map(df_realized, intern=None):
+    """
+    Converte o agregado de horas realizadas em um dicionário {date: horas} de um estagiário.
+    `intern` só pode ser omitido quando o agregado tem um único estagiário; horas de
+    estagiários diferentes nunca são somadas (levanta ValueError).
+    """
+    if intern is not None:
+        df_realized = df_realized[df_realized['estagiario'] == str(intern)]
+    elif df_realized['estagiario'].nunique() > 1:
+        raise ValueError("o agregado tem horas de mais de um estagiário; informe qual deles usar")
+    return df_realized.groupby('Data')['Horas realizadas'].sum().to_dict()
+
+def project_end_date(start_date, total_hours, hours_map, holidays, realized, as_of, overrides=None):
+    """
+    Reprojeta a data de término considerando as horas realizadas até `as_of` (inclusive)
+    e o padrão planejado de horas (com os ajustes por data) para os dias seguintes.
+    Retorna uma tupla (horas realizadas no período, data de término reprojetada).
+    """
+    realized_days = sorted(d for d in realized if start_date <= d <= as_of)
+
+    accumulated_hours = 0
+    for day in realized_days:
+        accumulated_hours += realized[day]
+        # Carga horária já cumprida com as horas realizadas
+        if accumulated_hours >= total_hours:
+            return accumulated_hours, day
+
+    # Os dias restantes seguem o planejamento a partir do dia seguinte a `as_of`
+    next_day = max(as_of + timedelta(days=1), start_date)
+    end_date = calculate_end_date(next_day, total_hours - accumulated_hours, hours_map, holidays, overrides)
+    return accumulated_hours, end_date
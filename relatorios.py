@@ -0,0 +1,274 @@
+import argparse
+import html
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import date, timedelta
+
+import pandas as pd
+
+from ajustes import HourOverrideIndex
+from calendarios import resolve_calendar
+from cronograma import calculate_schedule, calculate_end_date
+
+# --- Relatórios Mensais da Turma ---
+#
+# Gera, para cada estagiário cadastrado em COHORT_CSV, um pacote mensal com o
+# cronograma do mês (CSV), o resumo do mês (CSV) e um relatório HTML pronto para
+# impressão/PDF com o resumo e as observações do mês. Os estagiários são
+# processados em um pool de processos; cada pacote é gravado assim que fica
+# pronto e registrado no arquivo de progresso, o que permite retomar o job.
+#
+# Uso: python relatorios.py 2026-01 --saida relatorios --workers 4
+
+COHORT_CSV = 'estagiarios.csv'
+REPORTS_DIR = 'relatorios'
+PROGRESS_FILE = 'progresso.jsonl'
+COHORT_SUMMARY_CSV = 'resumo_turma.csv'
+
+# Colunas do cadastro da turma. horas_semana lista as horas de Seg a Dom (ex: "4,0,4,8,4,0,0");
+# calendarios é uma expressão de camadas (ver calendarios.py); observacoes e ajustes são
+# caminhos opcionais para CSVs nos formatos de observacoes.csv e ajustes_horas.csv.
+COHORT_COLUMNS = ['estagiario', 'nome', 'inicio', 'total_horas', 'horas_semana', 'calendarios', 'observacoes', 'ajustes']
+
+# Textos padrão que não são relatórios do dia (não aparecem na seção de observações)
+DEFAULT_OBSERVATIONS = {'Feriado/Dia sem estágio', 'Sobreaviso'}
+
+MONTH_NAMES = ['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+               'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
+
+def load_cohort(path=COHORT_CSV):
+    """Carrega o cadastro da turma como lista de dicionários (um por estagiário)."""
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    for column in COHORT_COLUMNS:
+        if column not in df.columns:
+            df[column] = ''
+    return df[COHORT_COLUMNS].to_dict('records')
+
+def _read_observations(path):
+    """Lê um CSV de observações (date,observacao) como {date: texto}."""
+    if not path or not os.path.exists(path):
+        return {}
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    dates = pd.to_datetime(df['date'], format='%Y-%m-%d').dt.date
+    return {d: obs for d, obs in zip(dates, df['observacao']) if obs}
+
+def _read_overrides(path):
+    """Lê um CSV de ajustes de horas (start,end,hours,description) como HourOverrideIndex."""
+    if not path or not os.path.exists(path):
+        return HourOverrideIndex()
+    df = pd.read_csv(path)
+    starts = pd.to_datetime(df['start'], format='%Y-%m-%d').dt.date
+    ends = pd.to_datetime(df['end'], format='%Y-%m-%d').dt.date
+    return HourOverrideIndex(
+        {'start': start, 'end': end, 'hours': hours}
+        for start, end, hours in zip(starts, ends, df['hours'])
+    )
+
+def _parse_weekly_hours(value):
+    """Converte horas_semana ("Seg,Ter,...,Dom") em {dia da semana: horas}; exige exatamente 7 valores."""
+    parts = [part.strip() for part in value.split(',')]
+    if len(parts) != 7:
+        raise ValueError(f"horas_semana deve ter 7 valores (Seg a Dom), recebido: '{value}'")
+    return {weekday: float(hours) for weekday, hours in enumerate(parts)}
+
+def _month_bounds(month):
+    """Primeiro e último dia de um mês no formato 'AAAA-MM'."""
+    year, month_number = (int(part) for part in month.split('-'))
+    first_day = date(year, month_number, 1)
+    next_month = date(year + 1, 1, 1) if month_number == 12 else date(year, month_number + 1, 1)
+    return first_day, next_month - timedelta(days=1)
+
+def _write_atomic(path, content):
+    """Grava o arquivo em um temporário e o substitui ao final, para não deixar pacotes pela metade."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+def _render_html(intern, month, summary, df_month, observations):
+    """Monta o relatório mensal em HTML, com estilos de impressão para exportar em PDF."""
+    first_day, _ = _month_bounds(month)
+    title = f"{html.escape(intern['nome'] or intern['estagiario'])} — {MONTH_NAMES[first_day.month - 1]} {first_day.year}"
+
+    rows = "".join(
+        f"<tr><td>{d.strftime('%d/%m/%Y')}</td><td>{html.escape(weekday)}</td>"
+        f"<td>{hours:g}h</td><td>{accumulated:g}h</td></tr>"
+        for d, weekday, hours, accumulated in zip(
+            df_month['Data'], df_month['Dia da semana'], df_month['Horas no dia'], df_month['Horas acumuladas']
+        )
+    )
+    obs_html = "".join(
+        f"<h3>{d.strftime('%d/%m/%Y')}</h3><div class='obs'>{html.escape(text)}</div>"
+        for d, text in observations
+    ) or "<p>Nenhuma observação registrada no mês.</p>"
+    end_date = summary['data_termino'] or '—'
+
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+    body {{ font-family: sans-serif; margin: 2rem; color: #222; }}
+    h1 {{ color: #1f77b4; }}
+    table {{ width: 100%; border-collapse: collapse; margin-bottom: 2rem; }}
+    th, td {{ padding: 6px; border: 1px solid #ccc; text-align: center; }}
+    th {{ background-color: #eee; }}
+    .obs {{ white-space: pre-wrap; line-height: 1.6; border-left: 4px solid #1f77b4; padding-left: 1rem; }}
+    @media print {{ h3 {{ page-break-after: avoid; }} .obs {{ page-break-inside: avoid; }} }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<table>
+<tr><th>Horas no mês</th><th>Dias de estágio</th><th>Horas acumuladas</th><th>Horas restantes</th><th>Data de término</th></tr>
+<tr><td>{summary['horas_mes']:g}h</td><td>{summary['dias_estagio']}</td><td>{summary['horas_acumuladas']:g}h</td><td>{summary['horas_restantes']:g}h</td><td>{end_date}</td></tr>
+</table>
+<h2>Cronograma do mês</h2>
+<table>
+<tr><th>Data</th><th>Dia da semana</th><th>Horas no dia</th><th>Horas acumuladas</th></tr>
+{rows}
+</table>
+<h2>Observações</h2>
+{obs_html}
+</body>
+</html>
+"""
+
+def build_intern_report(intern, month, output_dir):
+    """
+    Gera o pacote mensal de um estagiário em `output_dir/<estagiario>/`.
+    Executado nos processos do pool; retorna apenas o resumo do mês, não os dados completos.
+    """
+    first_day, last_day = _month_bounds(month)
+    start_date = date.fromisoformat(intern['inicio'])
+    total_hours = float(intern['total_horas'])
+    hours_map = _parse_weekly_hours(intern['horas_semana'])
+    holidays = resolve_calendar(intern['calendarios'])
+    overrides = _read_overrides(intern['ajustes'])
+
+    # Verifica antes de montar o cronograma dia a dia, que não terminaria sem horas previstas
+    if total_hours > 0 and calculate_end_date(start_date, total_hours, hours_map, holidays, overrides) is None:
+        raise ValueError(f"a carga horária de {total_hours:g}h nunca é atingida com horas_semana '{intern['horas_semana']}'")
+
+    observations = _read_observations(intern['observacoes'])
+    df_schedule, end_date = calculate_schedule(start_date, total_hours, hours_map, holidays, observations, overrides)
+
+    if df_schedule.empty:
+        df_schedule = pd.DataFrame(columns=['Data', 'Dia da semana', 'Horas no dia', 'Horas acumuladas', 'Observação'])
+    df_month = df_schedule[(df_schedule['Data'] >= first_day) & (df_schedule['Data'] <= last_day)]
+    until_month_end = df_schedule[df_schedule['Data'] <= last_day]
+    accumulated = float(until_month_end['Horas acumuladas'].iloc[-1]) if not until_month_end.empty else 0.0
+    month_observations = sorted(
+        (d, text) for d, text in observations.items()
+        if first_day <= d <= last_day and text.strip() not in DEFAULT_OBSERVATIONS
+    )
+
+    summary = {
+        'estagiario': intern['estagiario'],
+        'nome': intern['nome'],
+        'mes': month,
+        'horas_mes': float(df_month['Horas no dia'].sum()),
+        'dias_estagio': int((df_month['Horas no dia'] > 0).sum()),
+        'horas_acumuladas': accumulated,
+        'horas_restantes': max(total_hours - accumulated, 0.0),
+        'data_termino': end_date.strftime('%d/%m/%Y') if end_date else '',
+        'observacoes': len(month_observations),
+    }
+
+    intern_dir = os.path.join(output_dir, intern['estagiario'])
+    os.makedirs(intern_dir, exist_ok=True)
+    _write_atomic(os.path.join(intern_dir, 'cronograma.csv'), df_month.to_csv(index=False))
+    _write_atomic(os.path.join(intern_dir, 'resumo.csv'), pd.DataFrame([summary]).to_csv(index=False))
+    _write_atomic(os.path.join(intern_dir, 'relatorio.html'), _render_html(intern, month, summary, df_month, month_observations))
+    return summary
+
+def _load_progress(progress_path):
+    """Resumos dos estagiários já concluídos, registrados no arquivo de progresso."""
+    done = {}
+    if os.path.exists(progress_path):
+        with open(progress_path, encoding='utf-8') as f:
+            for line in f:
+                # Ignora uma última linha incompleta (job interrompido durante a gravação)
+                try:
+                    summary = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                done[summary['estagiario']] = summary
+    return done
+
+def run_report_job(month, output_dir=REPORTS_DIR, cohort=None, workers=None, on_progress=None):
+    """
+    Gera os pacotes do mês `month` ('AAAA-MM') para toda a turma em um pool de processos.
+    Estagiários já registrados no arquivo de progresso são pulados, então o job pode ser
+    retomado após uma interrupção. No máximo 2x `workers` tarefas ficam pendentes ao mesmo
+    tempo, mantendo a memória limitada mesmo para turmas grandes.
+    `on_progress(concluidos, total, estagiario, erro)` é chamado a cada estagiário finalizado.
+    Retorna (resumos concluídos, {estagiario: mensagem de erro}).
+    """
+    _month_bounds(month)  # Valida o formato do mês antes de iniciar o pool
+    cohort = load_cohort() if cohort is None else cohort
+    month_dir = os.path.join(output_dir, month)
+    os.makedirs(month_dir, exist_ok=True)
+    progress_path = os.path.join(month_dir, PROGRESS_FILE)
+
+    done = _load_progress(progress_path)
+    pending = iter([intern for intern in cohort if intern['estagiario'] not in done])
+    failures = {}
+    total = len(cohort)
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(progress_path, 'a', encoding='utf-8') as progress:
+        in_flight = {}
+
+        def submit_next():
+            intern = next(pending, None)
+            if intern is not None:
+                in_flight[pool.submit(build_intern_report, intern, month, month_dir)] = intern['estagiario']
+
+        for _ in range(2 * workers):
+            submit_next()
+
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                intern_id = in_flight.pop(future)
+                error = future.exception()
+                if error is None:
+                    summary = future.result()
+                    done[intern_id] = summary
+                    # Checkpoint: o estagiário só conta como concluído após seus arquivos estarem gravados
+                    progress.write(json.dumps(summary, ensure_ascii=False) + '\n')
+                    progress.flush()
+                else:
+                    failures[intern_id] = str(error)
+                if on_progress:
+                    on_progress(len(done) + len(failures), total, intern_id, error)
+                submit_next()
+
+    # Resumo consolidado da turma, na ordem do cadastro
+    summaries = [done[intern['estagiario']] for intern in cohort if intern['estagiario'] in done]
+    _write_atomic(os.path.join(month_dir, COHORT_SUMMARY_CSV), pd.DataFrame(summaries).to_csv(index=False))
+    return summaries, failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera os relatórios mensais de todos os estagiários da turma.")
+    parser.add_argument('mes', help="Mês do relatório no formato AAAA-MM")
+    parser.add_argument('--turma', default=COHORT_CSV, help=f"Cadastro da turma (padrão: {COHORT_CSV})")
+    parser.add_argument('--saida', default=REPORTS_DIR, help=f"Diretório de saída (padrão: {REPORTS_DIR})")
+    parser.add_argument('--workers', type=int, default=None, help="Número de processos (padrão: núcleos da máquina)")
+    args = parser.parse_args()
+
+    def print_progress(completed, total, intern_id, error):
+        status = f"ERRO: {error}" if error else "ok"
+        print(f"[{completed}/{total}] {intern_id} {status}", flush=True)
+
+    summaries, failures = run_report_job(args.mes, args.saida, load_cohort(args.turma), args.workers, print_progress)
+    print(f"{len(summaries)} relatório(s) em {os.path.join(args.saida, args.mes)}")
+    if failures:
+        print(f"{len(failures)} estagiário(s) com erro; execute novamente para retomar.")
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
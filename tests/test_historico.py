@@ -0,0 +1,130 @@
+import math
+import os
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import historico
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    """Histórico em diretório temporário, com checkpoints frequentes para exercitar o índice."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(historico, 'CHECKPOINT_INTERVAL', 5)
+    return historico
+
+
+def _record_random_edits(history, seed, count=600):
+    """Grava edições aleatórias e retorna a lista de (ts, estado completo após a edição)."""
+    rng = random.Random(seed)
+    now = datetime(2025, 11, 3, 8, 0)
+    state = {}
+    states = []
+    for i in range(count):
+        now += timedelta(minutes=rng.choice([1, 2, 4, 9, 11, 30, 240]))
+        for _ in range(rng.randint(1, 3)):
+            obs_date = date(2025, 11, 3) + timedelta(days=rng.randrange(20))
+            if rng.random() < 0.2:
+                state.pop(obs_date, None)
+            else:
+                state[obs_date] = f"obs {i}"
+        ts = now.isoformat(timespec='microseconds')
+        history.record_changes(dict(state), ts)
+        states.append((ts, dict(state)))
+    return states
+
+def _existed(states, ts, obs_date, obs):
+    """
+    Indica se a data teve a observação `obs` (None = ausente) em algum instante até `ts`;
+    antes da primeira edição o histórico está vazio.
+    """
+    return any(state.get(obs_date) == obs for state_ts, state in [('', {})] + states if state_ts <= ts)
+
+def _log_lines(history):
+    with open(history._history_paths()[0], encoding='utf-8') as f:
+        return f.readlines()
+
+@pytest.mark.parametrize('seed', range(3))
+def test_observations_as_of_returns_versions_that_existed(history, seed):
+    states = _record_random_edits(history, seed)
+    history.compact_history()
+    history.compact_history()
+
+    assert history.observations_as_of(None) == states[-1][1]
+
+    rng = random.Random(seed)
+    all_dates = {d for _, state in states for d in state}
+    queries = [ts for ts, _ in states] + [
+        (datetime(2025, 11, 3) + timedelta(minutes=rng.randrange(60 * 24 * 40))).isoformat(timespec='microseconds')
+        for _ in range(200)
+    ]
+    for ts in queries:
+        observations = history.observations_as_of(ts)
+        for obs_date in all_dates:
+            assert _existed(states, ts, obs_date, observations.get(obs_date)), (ts, obs_date)
+
+def test_compaction_is_idempotent(history):
+    _record_random_edits(history, seed=7)
+    history.compact_history()
+    once = _log_lines(history)
+    history.compact_history()
+    assert _log_lines(history) == once
+
+def test_merge_window_is_anchored_at_first_edit(history):
+    obs_date = date(2025, 12, 1)
+    for ts, obs in [('10:00', 'a'), ('10:10', 'b'), ('10:11', 'c')]:
+        history.record_changes({obs_date: obs}, f'2025-12-01T{ts}:00.000000')
+    for _ in range(2):
+        history.compact_history()
+        assert [obs for _, obs in history.observation_versions(obs_date)] == ['b', 'c']
+
+def test_checkpoints_are_logarithmic_and_cover_the_log(history):
+    _record_random_edits(history, seed=11, count=1500)
+    history.compact_history()
+
+    log_path, _, index_path = history._history_paths()
+    index = history._read_index(index_path)
+    entries = len(_log_lines(history))
+    candidates = entries // history.CHECKPOINT_INTERVAL
+    assert len(index) <= math.log2(candidates) + 2
+
+    # Entre dois checkpoints (ou antes do primeiro) há no máximo tantas entradas quanto a
+    # distância até o fim do log, mais um intervalo
+    line_ends = [0]
+    with open(log_path, 'rb') as f:
+        for line in f:
+            line_ends.append(line_ends[-1] + len(line))
+    positions = [0] + [line_ends.index(log_offset) for _, log_offset, _ in index]
+    for previous, position in zip(positions, positions[1:]):
+        assert position - previous <= entries - position + history.CHECKPOINT_INTERVAL
+
+def test_invalid_checkpoint_offsets_fall_back_to_full_replay(history):
+    states = _record_random_edits(history, seed=3, count=100)
+    _, _, index_path = history._history_paths()
+    rows = history._read_index(index_path)
+    with open(index_path, 'w', encoding='utf-8') as f:
+        f.write('ts,log_offset,checkpoint_offset\n')
+        for ts, log_offset, checkpoint_offset in rows:
+            f.write(f"{ts},{log_offset + 1},{checkpoint_offset + 1}\n")
+
+    assert history.observations_as_of(None) == states[-1][1]
+    assert history.record_changes({date(2025, 12, 24): 'Recesso'}) > 0
+    assert history.observations_as_of(None) == {date(2025, 12, 24): 'Recesso'}
+
+def test_interrupted_compaction_keeps_previous_generation(history):
+    states = _record_random_edits(history, seed=5, count=100)
+    history.compact_history()
+    generation = history._generation()
+
+    # Sobra de uma compactação interrompida antes da troca do ponteiro
+    leftover = history._history_paths(f"g{int(generation[1:]) + 1}")[0]
+    os.makedirs(os.path.dirname(leftover))
+    with open(leftover, 'w', encoding='utf-8') as f:
+        f.write('{"ts": ')
+
+    assert history._generation() == generation
+    assert history.observations_as_of(None) == states[-1][1]
+    history.compact_history()
+    assert history.observations_as_of(None) == states[-1][1]